@@ -1,10 +1,208 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+import orjson
+
+
+logger = logging.getLogger(__name__)
+
+_BASE_HEADERS = {"Accept":"application/vnd.github.v3+json"}
+
+# Shared HTTP/2 client so every page reuses one pooled TLS connection, with
+# concurrent page requests multiplexed over it instead of queued per socket.
+_client = httpx.Client(
+	timeout=10, follow_redirects=True,
+	headers=_BASE_HEADERS,
+	transport=httpx.HTTPTransport(http2=True, retries=3,
+								  limits=httpx.Limits(max_connections=16, max_keepalive_connections=8)))
+
+# Transient Github errors retried with exponential backoff, as httpx transport
+# retries only cover failed connections.
+_RETRY_STATUSES = (502, 503, 504)
+_MAX_RETRIES = 3
+_RETRY_BACKOFF = 0.3
+
+# Upper bound on pages fetched concurrently once the last page is known.
+_MAX_PAGE_WORKERS = 8
+
+# ETag and item values of previously fetched pages, keyed by URL, token hash
+# and query parameters, so unchanged pages are revalidated with a bodiless 304.
+# Least recently used pages are evicted past _ETAG_CACHE_SIZE entries.
+_ETAG_CACHE_SIZE = 256
+_etag_cache = OrderedDict()
+_etag_cache_lock = threading.Lock()
+
+
+def _auth_headers(access_token):
+	"""Build the per-call headers, sent on top of the client's base headers.
+
+	Built once per listing and shared by every page request of that listing.
+	"""
+	return {"Authorization":f"token {access_token}"}
+
+
+def _request(method, url, **kwargs):
+	"""Send a request on the shared client, retrying transient 5xx responses."""
+	response = _client.request(method, url, **kwargs)
+	for attempt in range(_MAX_RETRIES):
+		if response.status_code not in _RETRY_STATUSES:
+			break
+		time.sleep(_RETRY_BACKOFF * 2 ** attempt)
+		response = _client.request(method, url, **kwargs)
+	return response
+
+
+def _decode(response, error_message):
+	"""Decode a successful JSON response.
+
+	Args:
+		response (:class:`httpx.Response`): Github response.
+		error_message (str): Prefix of the error raised on failed requests.
+
+	Returns:
+		Decoded response body.
+
+	Raises:
+		Exception: If the response is not a 200 or its body is not JSON.
+
+	"""
+	if response.status_code != 200:
+		# error bodies may be HTML (e.g. a 502 page) or empty (e.g. a 304)
+		try:
+			message = orjson.loads(response.content)["message"]
+		except (orjson.JSONDecodeError, KeyError, TypeError):
+			message = f"HTTP {response.status_code}"
+		raise Exception(f"{error_message}: {message}")
+	try:
+		return orjson.loads(response.content)
+	except orjson.JSONDecodeError as e:
+		raise Exception(f"{error_message}: invalid JSON response") from e
+
+
+def _etag_cache_get(key):
+	"""Return the cached ETag entry for `key`, marking it recently used."""
+	with _etag_cache_lock:
+		cached = _etag_cache.get(key)
+		if cached is not None:
+			_etag_cache.move_to_end(key)
+		return cached
+
+
+def _etag_cache_set(key, entry):
+	"""Cache an ETag entry, evicting the least recently used one if full."""
+	with _etag_cache_lock:
+		_etag_cache[key] = entry
+		_etag_cache.move_to_end(key)
+		if len(_etag_cache) > _ETAG_CACHE_SIZE:
+			_etag_cache.popitem(last=False)
+
+
+def _fetch_page(url, headers, params, field, error_message):
+	"""Retrieve a single page of a Github listing, revalidating cached pages.
+
+	Args:
+		url (str): Endpoint URL.
+		headers (dict): Request headers for this call.
+		params (dict): Query parameters, including page and per_page.
+		field (str): Item property used as both id and name.
+		error_message (str): Prefix of the error raised on failed requests.
+
+	Returns:
+		Tuple of the items in the page and the parsed Link header.
+
+	Raises:
+		Exception: If Github responds with an error.
+
+	"""
+	token_hash = hashlib.sha256(headers.get("Authorization", "").encode()).hexdigest()
+	key = (url, token_hash, tuple(sorted(params.items())))
+	cached = _etag_cache_get(key)
+	if cached is not None:
+		headers = {**headers, "If-None-Match":cached[0]}
+	response = _request("GET", url, headers=headers, params=params)
+	if response.status_code == 304 and cached is not None:
+		# The ETag only covers the page body, so pagination is planned from
+		# this response's Link header, never a cached one. Without one, a full
+		# page may be followed by items added since it was cached.
+		links = response.links
+		if not links and len(cached[1]) == params["per_page"]:
+			links = {"next":{"rel":"next", "url":None}}
+		return [{"id":value, "name":value} for value in cached[1]], links
+	items_json = _decode(response, error_message)
+	# Only the immutable values are cached, callers get fresh item dicts.
+	values = tuple([item[field] for item in items_json])
+	etag = response.headers.get("ETag")
+	if etag:
+		_etag_cache_set(key, (etag, values))
+	return [{"id":value, "name":value} for value in values], response.links
+
+
+def _last_page(links):
+	"""Extract the last page number from a parsed Link header, if present."""
+	last = links.get("last")
+	if last is None:
+		return None
+	return int(parse_qs(urlparse(last["url"]).query)["page"][0])
+
+
+def _fetch_all_pages(url, headers, params, page, page_size, field, error_message):
+	"""Retrieve every page of a Github listing starting at `page`.
+
+	The first page is fetched alone; its Link header tells how many pages
+	remain, which are then fetched concurrently on the shared client.
+
+	Args:
+		url (str): Endpoint URL.
+		headers (dict): Request headers for this call.
+		params (dict): Query parameters other than page and per_page.
+		page (int): First page to retrieve.
+		page_size (int): Page size per request.
+		field (str): Item property used as both id and name.
+		error_message (str): Prefix of the error raised on failed requests.
+
+	Returns:
+		List of items across all pages, in page order.
+
+	Raises:
+		Exception: If Github responds with an error.
+
+	"""
+	items, links = _fetch_page(url, headers, {**params, "page":page, "per_page":page_size}, field, error_message)
+	results = list(items)
+	last = _last_page(links)
+	if last is not None:
+		if last > page:
+			with ThreadPoolExecutor(max_workers=min(_MAX_PAGE_WORKERS, last - page)) as executor:
+				futures = [executor.submit(_fetch_page, url, headers, {**params, "page":p, "per_page":page_size},
+										   field, error_message)
+						   for p in range(page + 1, last + 1)]
+				results.extend(chain.from_iterable(future.result()[0] for future in futures))
+		return results
+
+	# Without a last page to plan from, follow rel="next" links one at a time.
+	# Their absence is authoritative, so a final page that happens to be full
+	# does not cost an extra request for an empty one.
+	while "next" in links:
+		page += 1
+		items, links = _fetch_page(url, headers, {**params, "page":page, "per_page":page_size}, field, error_message)
+		results.extend(items)
+	return results
+
+
 def list_organizations(access_token, page_size=50, page=1):
 	"""Retrieve list of organizations the Github user belongs to.
 
 	Args:
 		access_token (str): OAuth token.
 		page_size (int, optional): Page size per request, defaults to 50.
-		page (int, optional): Page to retrieve, defaults to 1.
+		page (int, optional): First page to retrieve, defaults to 1.
 
 	Returns:
 		List of organizations.
@@ -15,31 +213,21 @@ def list_organizations(access_token, page_size=50, page=1):
 	"""
 	exception = Exception("Error retrieving Github organizations.")
 	try:
-		response = requests.get("https://api.github.com/user/orgs", timeout=10, headers={"Accept":"vnd.github.v3+json","Authorization":"token "+str(access_token)},
-																	params={"page":page, "per_page":page_size})
-		orgs_json = response.json()
-		if response.status_code != 200:
-			raise Exception("Error listing organizations: "+str(orgs_json["message"]))
-		orgs = []
-		for org in orgs_json:
-			orgs.append({"id":org["login"], "name":org["login"]})
-
-		if len(orgs) == page_size:
-			next_orgs = list_organizations(access_token, page_size, page+1)
-			orgs = orgs + next_orgs
-		return orgs
-	except requests.exceptions.Timeout as e:
+		headers = _auth_headers(access_token)
+		return _fetch_all_pages("https://api.github.com/user/orgs", headers, {}, page, page_size,
+								"login", "Error listing organizations")
+	except httpx.TimeoutException as e:
 		logger.error(f"Request timed out. {e}")
-		raise exception
-	except requests.exceptions.TooManyRedirects as e:
+		raise exception from e
+	except httpx.TooManyRedirects as e:
 		logger.error(f"Too many redirects. {e}")
-		raise exception
-	except requests.exceptions.RequestException as e:
+		raise exception from e
+	except httpx.RequestError as e:
 		logger.error(f"Request error occurred. {e}")
-		raise exception
-	except Exception as e:
-		logger.error("Error listing Github organizations: " + str(e))
-		raise Exception(e)
+		raise exception from e
+	except Exception:
+		logger.exception("Error listing Github organizations.")
+		raise
 
 
 def list_user_repos(access_token, page_size=50, page=1):
@@ -48,7 +236,7 @@ def list_user_repos(access_token, page_size=50, page=1):
 	Args:
 		access_token (str): OAuth token.
 		page_size (int, optional): Page size per request, defaults to 50.
-		page (int, optional): Page to retrieve, defaults to 1.
+		page (int, optional): First page to retrieve, defaults to 1.
 
 	Returns:
 		List of repositories.
@@ -59,31 +247,21 @@ def list_user_repos(access_token, page_size=50, page=1):
 	"""
 	exception = Exception("Error retrieving Github repositories for user.")
 	try:
-		response = requests.get("https://api.github.com/user/repos", timeout=10, headers={"Accept":"vnd.github.v3+json","Authorization":"token "+str(access_token)},
-																	params={"page":page, "sort":"full_name","per_page":page_size, "type":"all"})
-		repos_json = response.json()
-		if response.status_code != 200:
-			raise Exception("Error listing repositories: "+str(repos_json["message"]))
-		repos = []
-		for repo in repos_json:
-			repos.append({"id":repo["name"], "name":repo["name"]})
-
-		if len(repos) == page_size:
-			next_repos = list_user_repos(access_token, page_size, page+1)
-			repos = repos + next_repos
-		return repos
-	except requests.exceptions.Timeout as e:
+		headers = _auth_headers(access_token)
+		return _fetch_all_pages("https://api.github.com/user/repos", headers, {"sort":"full_name", "type":"all"},
+								page, page_size, "name", "Error listing repositories")
+	except httpx.TimeoutException as e:
 		logger.error(f"Request timed out. {e}")
-		raise exception
-	except requests.exceptions.TooManyRedirects as e:
+		raise exception from e
+	except httpx.TooManyRedirects as e:
 		logger.error(f"Too many redirects. {e}")
-		raise exception
-	except requests.exceptions.RequestException as e:
+		raise exception from e
+	except httpx.RequestError as e:
 		logger.error(f"Request error occurred. {e}")
-		raise exception
-	except Exception as e:
-		logger.error("Error listing Github Repositories: " + str(e))
-		raise Exception(e)
+		raise exception from e
+	except Exception:
+		logger.exception("Error listing Github Repositories.")
+		raise
 
 
 def list_org_repos(access_token, org_id, page_size=50, page=1):
@@ -93,7 +271,7 @@ def list_org_repos(access_token, org_id, page_size=50, page=1):
 		access_token (str): OAuth token.
 		org_id (str): Organization ID.
 		page_size (int, optional): Page size per request, defaults to 50.
-		page (int, optional): Page to retrieve, defaults to 1.
+		page (int, optional): First page to retrieve, defaults to 1.
 
 	Returns:
 		List of repositories.
@@ -104,28 +282,144 @@ def list_org_repos(access_token, org_id, page_size=50, page=1):
 	"""
 	exception = Exception("Error retrieving Github repositories for org.")
 	try:
-		response = requests.get("https://api.github.com/orgs/"+str(org_id)+"/repos", timeout=10, headers={"Accept":"vnd.github.v3+json","Authorization":"token "+str(access_token)},
-																	params={"page":page, "sort":"full_name", "per_page":page_size, "type":"all"})
-		repos_json = response.json()
-		if response.status_code != 200:
-			raise Exception("Error listing repositories: "+str(repos_json["message"]))
+		headers = _auth_headers(access_token)
+		return _fetch_all_pages(f"https://api.github.com/orgs/{org_id}/repos", headers,
+								{"sort":"full_name", "type":"all"}, page, page_size, "name", "Error listing repositories")
+	except httpx.TimeoutException as e:
+		logger.error(f"Request timed out. {e}")
+		raise exception from e
+	except httpx.TooManyRedirects as e:
+		logger.error(f"Too many redirects. {e}")
+		raise exception from e
+	except httpx.RequestError as e:
+		logger.error(f"Request error occurred. {e}")
+		raise exception from e
+	except Exception:
+		logger.exception("Error listing Github Organization Repositories.")
+		raise
+
+
+_GRAPHQL_URL = "https://api.github.com/graphql"
+
+# Organizations with their first page of repositories, plus the viewer's own
+# repositories. Either connection can be skipped once it is exhausted.
+_VIEWER_QUERY = """
+query($withOrgs: Boolean!, $orgsCursor: String, $withRepos: Boolean!, $reposCursor: String) {
+  viewer {
+    organizations(first: 100, after: $orgsCursor) @include(if: $withOrgs) {
+      nodes {
+        login
+        repositories(first: 100, orderBy: {field: NAME, direction: ASC}) {
+          nodes { name }
+          pageInfo { endCursor hasNextPage }
+        }
+      }
+      pageInfo { endCursor hasNextPage }
+    }
+    repositories(first: 100, after: $reposCursor, orderBy: {field: NAME, direction: ASC},
+                 affiliations: [OWNER, COLLABORATOR, ORGANIZATION_MEMBER],
+                 ownerAffiliations: [OWNER, COLLABORATOR, ORGANIZATION_MEMBER]) @include(if: $withRepos) {
+      nodes { name }
+      pageInfo { endCursor hasNextPage }
+    }
+  }
+}
+"""
+
+# Remaining repositories of an organization with more than one page of them.
+_ORG_REPOS_QUERY = """
+query($login: String!, $cursor: String) {
+  organization(login: $login) {
+    repositories(first: 100, after: $cursor, orderBy: {field: NAME, direction: ASC}) {
+      nodes { name }
+      pageInfo { endCursor hasNextPage }
+    }
+  }
+}
+"""
+
+
+def _graphql(headers, query, variables):
+	"""Run a query against the Github GraphQL API.
+
+	Args:
+		headers (dict): Request headers for this call.
+		query (str): GraphQL query.
+		variables (dict): Query variables.
+
+	Returns:
+		The `data` member of the response.
+
+	Raises:
+		Exception: If Github responds with an error.
+
+	"""
+	response = _request("POST", _GRAPHQL_URL, headers=headers, json={"query":query, "variables":variables})
+	body = _decode(response, "Error querying Github GraphQL API")
+	if body.get("errors"):
+		raise Exception(f"Error querying Github GraphQL API: {body['errors'][0]['message']}")
+	return body["data"]
+
+
+def list_orgs_and_repos_graphql(access_token):
+	"""Retrieve the user's organizations and repositories in as few requests as possible.
+
+	Uses the Github GraphQL API, which returns organizations together with
+	their repositories, instead of paginating the REST endpoints per org.
+
+	Args:
+		access_token (str): OAuth token.
+
+	Returns:
+		Dict with `organizations` (list of organizations), `repos` (list of
+		the user's repositories) and `org_repos` (lists of repositories keyed
+		by organization ID), each item in the same shape as the REST listings.
+		Repositories are ordered by name rather than by the REST listings'
+		`full_name` (owner/name), so `repos` may differ in order, not content,
+		from :func:`list_user_repos`.
+
+	Raises:
+		Exception: If request fails or error occurs.
+
+	"""
+	exception = Exception("Error retrieving Github organizations and repositories.")
+	try:
+		headers = _auth_headers(access_token)
+		orgs = []
 		repos = []
-		for repo in repos_json:
-			repos.append({"id":repo["name"], "name":repo["name"]})
-
-		if len(repos) == page_size:
-			next_repos = list_org_repos(access_token, org_id, page_size, page+1)
-			repos = repos + next_repos
-		return repos
-	except requests.exceptions.Timeout as e:
+		org_repos = {}
+		variables = {"withOrgs":True, "orgsCursor":None, "withRepos":True, "reposCursor":None}
+		while variables["withOrgs"] or variables["withRepos"]:
+			viewer = _graphql(headers, _VIEWER_QUERY, variables)["viewer"]
+			if variables["withOrgs"]:
+				for org in viewer["organizations"]["nodes"]:
+					login = org["login"]
+					orgs.append({"id":login, "name":login})
+					org_repos[login] = [{"id":(name := repo["name"]), "name":name} for repo in org["repositories"]["nodes"]]
+					page_info = org["repositories"]["pageInfo"]
+					while page_info["hasNextPage"]:
+						connection = _graphql(headers, _ORG_REPOS_QUERY,
+											  {"login":login, "cursor":page_info["endCursor"]})["organization"]["repositories"]
+						org_repos[login].extend([{"id":(name := repo["name"]), "name":name} for repo in connection["nodes"]])
+						page_info = connection["pageInfo"]
+				page_info = viewer["organizations"]["pageInfo"]
+				variables["withOrgs"] = page_info["hasNextPage"]
+				variables["orgsCursor"] = page_info["endCursor"]
+			if variables["withRepos"]:
+				repos.extend([{"id":(name := repo["name"]), "name":name} for repo in viewer["repositories"]["nodes"]])
+				page_info = viewer["repositories"]["pageInfo"]
+				variables["withRepos"] = page_info["hasNextPage"]
+				variables["reposCursor"] = page_info["endCursor"]
+		return {"organizations":orgs, "repos":repos, "org_repos":org_repos}
+	except httpx.TimeoutException as e:
 		logger.error(f"Request timed out. {e}")
-		raise exception
-	except requests.exceptions.TooManyRedirects as e:
+		raise exception from e
+	except httpx.TooManyRedirects as e:
 		logger.error(f"Too many redirects. {e}")
-		raise exception
-	except requests.exceptions.RequestException as e:
+		raise exception from e
+	except httpx.RequestError as e:
 		logger.error(f"Request error occurred. {e}")
-		raise exception
-	except Exception as e:
-		logger.error("Error listing Github Organization Repositories: " + str(e))
-		raise Exception(e)
\ No newline at end of file
+		raise exception from e
+	except Exception:
+		logger.exception("Error listing Github organizations and repositories.")
+		raise
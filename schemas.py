@@ -1,4 +1,4 @@
-import inspect
+import functools
 from marshmallow import validate, fields, Schema as MarshmallowSchema
 from marshmallow.utils import EXCLUDE
 
@@ -14,6 +14,45 @@ class Schema(MarshmallowSchema):
         unknown = EXCLUDE
 
 
+@functools.lru_cache(maxsize=None)
+def _error_messages(name, invalid=None):
+    """Build the error messages shared by most fields, once per name.
+
+    Args:
+        name (str): Field name.
+        invalid (str, optional): Format string for the `invalid` message,
+            omitted if None.
+
+    Returns:
+        dict: Error messages. Fields copy it, so it is shared across calls
+            and must not be mutated.
+
+    """
+    messages = {"required": strings.missing_required_field % name,
+                "null": strings.field_may_not_be_null % name}
+    if invalid is not None:
+        messages["invalid"] = invalid % name
+    return messages
+
+
+@functools.lru_cache(maxsize=None)
+def _positive_range(name):
+    """Range validator for positive integers, shared per field name."""
+    return validate.Range(min=1, error=strings.must_be_positive_integer % name)
+
+
+@functools.lru_cache(maxsize=None)
+def _non_negative_range(name):
+    """Range validator for positive integers or zero, shared per field name."""
+    return validate.Range(min_inclusive=0, error=strings.must_be_non_negative_integer % name)
+
+
+@functools.lru_cache(maxsize=None)
+def _non_empty_list(name):
+    """Length validator for non-empty lists, shared per field name."""
+    return validate.Length(min=1, error=strings.list_must_be_non_empty % name)
+
+
 def get_int_field(name: str, strict=True, required=True, extra_validators=None, allow_none=False, **kwargs) -> fields.Integer:
     """Generate Integer field.
 
@@ -34,9 +73,7 @@ def get_int_field(name: str, strict=True, required=True, extra_validators=None,
         extra_validators = []
     return fields.Integer(
         required=required, strict=strict, allow_none=allow_none,
-        error_messages={"invalid": strings.must_be_positive_integer % name,
-                        "required": strings.missing_required_field % name,
-                        "null": strings.field_may_not_be_null % name},
+        error_messages=_error_messages(name, strings.must_be_positive_integer),
         validate=extra_validators,
         **kwargs
     )
@@ -62,11 +99,8 @@ def get_positive_int_field(name: str, strict=True, required=True, extra_validato
         extra_validators = []
     return fields.Integer(
         required=required, strict=strict, allow_none=allow_none,
-        error_messages={"invalid": strings.must_be_positive_integer % name,
-                        "required": strings.missing_required_field % name,
-                        "null": strings.field_may_not_be_null % name },
-        validate=[validate.Range(min=1, error=strings.must_be_positive_integer % name),
-                  *extra_validators],
+        error_messages=_error_messages(name, strings.must_be_positive_integer),
+        validate=[_positive_range(name), *extra_validators],
         **kwargs
     )
 
@@ -92,11 +126,8 @@ def get_non_negative_int_field(name: str, strict=True, required=True, allow_none
         extra_validators = []
     return fields.Integer(
         required=required, strict=strict, allow_none=allow_none,
-        error_messages={"invalid": strings.must_be_integer % name,
-                        "required": strings.missing_required_field % name,
-                        "null": strings.field_may_not_be_null % name },
-        validate=[validate.Range(min_inclusive=0, error=strings.must_be_non_negative_integer % name),
-                  *extra_validators],
+        error_messages=_error_messages(name, strings.must_be_integer),
+        validate=[_non_negative_range(name), *extra_validators],
         **kwargs
     )
 
@@ -128,11 +159,7 @@ def get_string_field(name, strict=True, required=True, extra_validators=None, al
         required=required, strict=strict,
         validate=validators_,
         allow_none=allow_none,
-        error_messages={
-            "required": strings.missing_required_field % name,
-            "invalid": strings.must_be_string % name,
-            "null": strings.field_may_not_be_null % name,
-        },
+        error_messages=_error_messages(name, strings.must_be_string),
         allow_empty=True
     )
 
@@ -177,17 +204,15 @@ def get_list_field(name, schema_or_field, required=True, allow_empty=False, allo
 
     """
     is_nested = isinstance(schema_or_field, Schema) or (
-        inspect.isclass(schema_or_field) and issubclass(schema_or_field, Schema))
+        isinstance(schema_or_field, type) and issubclass(schema_or_field, Schema))
     validators_ = []
     if not allow_empty:
-        validators_.append(validate.Length(min=1, error=strings.list_must_be_non_empty % name))
+        validators_.append(_non_empty_list(name))
     return fields.List(
         fields.Nested(schema_or_field) if is_nested else schema_or_field,
         allow_none=allow_none,
         error_messages={"type": strings.must_be_list % name,
-                        "invalid": strings.must_be_list % name,
-                        "required": strings.missing_required_field % name,
-                        "null": strings.field_may_not_be_null % name},
+                        **_error_messages(name, strings.must_be_list)},
         required=required, validate=validators_,
         **kwargs
     )
@@ -226,10 +251,7 @@ def get_raw_field(name, required=True, allow_none=False):
     """
     return fields.Raw(
         required=required, allow_none=allow_none,
-        error_messages={
-            "required": strings.missing_required_field % name,
-            "null": strings.field_may_not_be_null % name,
-        }
+        error_messages=_error_messages(name)
     )
 
 
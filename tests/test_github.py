@@ -0,0 +1,180 @@
+import unittest
+from unittest.mock import patch
+
+import httpx
+import orjson
+
+import github
+
+
+def link_header(url, **pages):
+    return ", ".join(f'<{url}?page={page}&per_page=2>; rel="{rel}"' for rel, page in pages.items())
+
+
+class TestGithub(unittest.TestCase):
+    def setUp(self) -> None:
+        github._etag_cache.clear()
+        self.requests = []
+        self.original_client = github._client
+
+    def tearDown(self) -> None:
+        github._client.close()
+        github._client = self.original_client
+
+    def mock(self, handler):
+        def record(request):
+            self.requests.append(request)
+            return handler(request)
+        github._client = httpx.Client(headers=github._BASE_HEADERS, transport=httpx.MockTransport(record))
+
+    def test_fetch_all_pages_with_last_link(self):
+        url = "https://api.github.com/user/orgs"
+        pages = {1: ["a", "b"], 2: ["c", "d"], 3: ["e"]}
+
+        def handler(request):
+            page = int(request.url.params["page"])
+            headers = {"Link": link_header(url, next=page + 1, last=3)} if page == 1 else {}
+            return httpx.Response(200, json=[{"login": login} for login in pages[page]], headers=headers)
+
+        self.mock(handler)
+        orgs = github.list_organizations("token", page_size=2)
+        self.assertEqual([org["id"] for org in orgs], ["a", "b", "c", "d", "e"])
+        self.assertEqual(sorted(int(r.url.params["page"]) for r in self.requests), [1, 2, 3])
+        self.assertEqual(self.requests[0].headers["Authorization"], "token token")
+
+    def test_fetch_all_pages_with_next_link(self):
+        url = "https://api.github.com/user/repos"
+        pages = {1: ["a", "b"], 2: ["c", "d"]}
+
+        def handler(request):
+            page = int(request.url.params["page"])
+            headers = {"Link": link_header(url, next=2)} if page == 1 else {}
+            return httpx.Response(200, json=[{"name": name} for name in pages[page]], headers=headers)
+
+        self.mock(handler)
+        repos = github.list_user_repos("token", page_size=2)
+        # the full second page has no next link, so no empty third page is requested
+        self.assertEqual([repo["name"] for repo in repos], ["a", "b", "c", "d"])
+        self.assertEqual([int(r.url.params["page"]) for r in self.requests], [1, 2])
+
+    def test_not_modified_page_is_served_from_cache(self):
+        def handler(request):
+            if request.headers.get("If-None-Match") == '"v1"':
+                return httpx.Response(304)
+            return httpx.Response(200, json=[{"name": "a"}], headers={"ETag": '"v1"'})
+
+        self.mock(handler)
+        first = github.list_org_repos("token", "org", page_size=2)
+        second = github.list_org_repos("token", "org", page_size=2)
+        self.assertEqual(first, second)
+        self.assertEqual(second, [{"id": "a", "name": "a"}])
+        self.assertEqual(self.requests[1].headers["If-None-Match"], '"v1"')
+        self.assertEqual(self.requests[1].url.path, "/orgs/org/repos")
+
+    def test_mutating_result_does_not_change_cache(self):
+        def handler(request):
+            if request.headers.get("If-None-Match") == '"v1"':
+                return httpx.Response(304)
+            return httpx.Response(200, json=[{"login": "a"}], headers={"ETag": '"v1"'})
+
+        self.mock(handler)
+        orgs = github.list_organizations("token")
+        orgs[0]["name"] = "MUTATED"
+        self.assertEqual(github.list_organizations("token"), [{"id": "a", "name": "a"}])
+        self.assertEqual(self.requests[1].headers["If-None-Match"], '"v1"')
+
+    def test_not_modified_page_plans_from_fresh_link(self):
+        url = "https://api.github.com/user/orgs"
+
+        def handler(request):
+            page = int(request.url.params["page"])
+            if page == 2:
+                return httpx.Response(200, json=[{"login": "c"}])
+            if request.headers.get("If-None-Match") == '"v1"':
+                return httpx.Response(304, headers={"Link": link_header(url, next=2, last=2)})
+            return httpx.Response(200, json=[{"login": "a"}, {"login": "b"}], headers={"ETag": '"v1"'})
+
+        self.mock(handler)
+        self.assertEqual(len(github.list_organizations("token", page_size=2)), 2)
+        orgs = github.list_organizations("token", page_size=2)
+        self.assertEqual([org["id"] for org in orgs], ["a", "b", "c"])
+
+    @patch("github.time.sleep")
+    def test_transient_error_is_retried(self, sleep):
+        responses = [httpx.Response(502), httpx.Response(200, json=[{"login": "a"}])]
+        self.mock(lambda request: responses.pop(0))
+        self.assertEqual(github.list_organizations("token"), [{"id": "a", "name": "a"}])
+        self.assertEqual(len(self.requests), 2)
+        sleep.assert_called_once_with(github._RETRY_BACKOFF)
+
+    @patch("github.time.sleep")
+    def test_retries_stop_after_max_retries(self, sleep):
+        self.mock(lambda request: httpx.Response(503, json={"message": "Unavailable"}))
+        with self.assertLogs("github", level="ERROR"):
+            with self.assertRaisesRegex(Exception, "Unavailable"):
+                github.list_organizations("token")
+        self.assertEqual(len(self.requests), github._MAX_RETRIES + 1)
+        self.assertEqual(sleep.call_count, github._MAX_RETRIES)
+
+    @patch("github.time.sleep")
+    def test_non_json_error_body_raises_documented_error(self, sleep):
+        self.mock(lambda request: httpx.Response(502, text="<html>Bad Gateway</html>"))
+        with self.assertLogs("github", level="ERROR"):
+            with self.assertRaisesRegex(Exception, "^Error listing organizations: HTTP 502$"):
+                github.list_organizations("token")
+        with self.assertLogs("github", level="ERROR"):
+            with self.assertRaisesRegex(Exception, "^Error querying Github GraphQL API: HTTP 502$"):
+                github.list_orgs_and_repos_graphql("token")
+
+    def test_etag_cache_evicts_least_recently_used(self):
+        self.mock(lambda request: httpx.Response(200, json=[], headers={"ETag": '"v1"'}))
+        with patch.object(github, "_ETAG_CACHE_SIZE", 2):
+            for org in ("a", "b"):
+                github.list_org_repos("token", org)
+            github.list_org_repos("token", "a")
+            github.list_org_repos("token", "c")
+        self.assertEqual([key[0] for key in github._etag_cache],
+                         ["https://api.github.com/orgs/a/repos", "https://api.github.com/orgs/c/repos"])
+
+    def test_error_response_is_reraised(self):
+        self.mock(lambda request: httpx.Response(401, json={"message": "Bad credentials"}))
+        with self.assertLogs("github", level="ERROR"):
+            with self.assertRaisesRegex(Exception, "^Error listing organizations: Bad credentials$"):
+                github.list_organizations("token")
+
+    def test_list_orgs_and_repos_graphql(self):
+        def connection(names, cursor=None):
+            return {"nodes": [{"name": name} for name in names],
+                    "pageInfo": {"endCursor": cursor, "hasNextPage": cursor is not None}}
+
+        def handler(request):
+            variables = orjson.loads(request.content)["variables"]
+            if "login" in variables:
+                self.assertEqual((variables["login"], variables["cursor"]), ("org1", "org1-repos-1"))
+                return httpx.Response(200, json={"data": {"organization": {"repositories": connection(["r3"])}}})
+            viewer = {}
+            if variables["withOrgs"]:
+                if variables["orgsCursor"] is None:
+                    viewer["organizations"] = {
+                        "nodes": [{"login": "org1", "repositories": connection(["r1", "r2"], "org1-repos-1")}],
+                        "pageInfo": {"endCursor": "orgs-1", "hasNextPage": True}}
+                else:
+                    viewer["organizations"] = {
+                        "nodes": [{"login": "org2", "repositories": connection(["r4"])}],
+                        "pageInfo": {"endCursor": None, "hasNextPage": False}}
+            if variables["withRepos"]:
+                self.assertIsNone(variables["reposCursor"])
+                viewer["repositories"] = connection(["mine"])
+            return httpx.Response(200, json={"data": {"viewer": viewer}})
+
+        self.mock(handler)
+        result = github.list_orgs_and_repos_graphql("token")
+        self.assertEqual(result["organizations"], [{"id": "org1", "name": "org1"}, {"id": "org2", "name": "org2"}])
+        self.assertEqual(result["repos"], [{"id": "mine", "name": "mine"}])
+        self.assertEqual({org: [repo["id"] for repo in repos] for org, repos in result["org_repos"].items()},
+                         {"org1": ["r1", "r2", "r3"], "org2": ["r4"]})
+        self.assertEqual(len(self.requests), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
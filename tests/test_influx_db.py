@@ -3,21 +3,23 @@ from uuid import uuid4
 
 import dotenv
 import influxdb_client
-from influxdb_client.client.write_api import SYNCHRONOUS, WriteApi
+from influxdb_client.client.write_api import WriteOptions
 from influxdb_client.client.query_api import QueryApi
 
 
 class TestInfluxDB(unittest.TestCase):
-    def setUp(self):
+    @classmethod
+    def setUpClass(cls):
         dotenv.load_dotenv()
-        self.bucket = "test_bucket"
+        cls.bucket = "test_bucket"
         # set environment variables INFLUXDB_V2_TOKEN, INFLUXDB_V2_URL, INFLUXDB_V2_ORG
-        self.client = influxdb_client.InfluxDBClient.from_env_properties()
-        self.write_api: WriteApi = self.client.write_api(write_options=SYNCHRONOUS)
-        self.query_api: QueryApi = self.client.query_api()
+        cls.client = influxdb_client.InfluxDBClient.from_env_properties()
+        cls.write_options = WriteOptions(batch_size=500, flush_interval=500)
+        cls.query_api: QueryApi = cls.client.query_api()
 
-    def tearDown(self) -> None:
-        self.client.close()
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.client.close()
 
     def test_connection(self):
         self.assertTrue(self.client.ping())
@@ -25,9 +27,11 @@ class TestInfluxDB(unittest.TestCase):
     def test_write(self):
         uid = str(uuid4())
         p = influxdb_client.Point("Testing").field("uuid", uid)
-        self.write_api.write(bucket=self.bucket, record=p)
-        query = 'from(bucket:"test_bucket") |> range(start: -10s) |> filter(fn: (r) => r._measurement == "Testing") |> filter(fn: (r) => r._field == "uuid") |> last()'
+        # closing the batching WriteApi flushes pending points before the query
+        with self.client.write_api(write_options=self.write_options) as write_api:
+            write_api.write(bucket=self.bucket, record=p)
+        query = 'from(bucket:"test_bucket") |> range(start: -5s, stop: now()) |> filter(fn: (r) => r._measurement == "Testing" and r._field == "uuid") |> last()'
         tables = self.query_api.query(query)
-        for table in tables:
-            for record in table.records:
-                self.assertEqual(record.get_value(), uid)
\ No newline at end of file
+        # batched writes report failures through callbacks, so check the point was read back
+        values = [record.get_value() for table in tables for record in table.records]
+        self.assertEqual(values, [uid])
\ No newline at end of file
@@ -1,18 +1,63 @@
 import datetime
+import re
 import unittest
 import uuid
 import pytz
 
 import dotenv
 from influxdb_client import InfluxDBClient
+from influxdb_client.rest import ApiException
 
 from services.influxdb import InfluxDB
 
+# Queries read their values from Flux `params`, which only InfluxDB Cloud
+# supports; against InfluxDB OSS the values are inlined as Flux literals.
+USAGE_LOG_QUERY = '''from(bucket: params.bucket)
+    |> range(start: params.start, stop: params.stop)
+    |> filter(fn: (r) => r._measurement == "usageLog" and r.device == "cpu" and r.id == params.id)
+'''
+
+AIR_TEMPERATURE_QUERY = '''from(bucket: params.bucket)
+    |> range(start: params.start, stop: params.stop)
+    |> filter(fn: (r) => r._measurement == "airTemperature" and r.sensor_id == params.id)
+    |> yield()
+'''
+
+
+def flux_literal(value):
+    """Render a query parameter as a Flux literal."""
+    if isinstance(value, datetime.datetime):
+        return value.astimezone(pytz.UTC).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+    return '"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
 
 class TestInfluxDBService(unittest.TestCase):
-    def setUp(self) -> None:
+    @classmethod
+    def setUpClass(cls) -> None:
         dotenv.load_dotenv()
-        self.bucket = "test_bucket"
+        cls.bucket = "test_bucket"
+        cls.client = InfluxDBClient.from_env_properties()
+        cls.query_api = cls.client.query_api()
+        cls.supports_params = True
+        try:
+            cls.query_api.query('buckets() |> filter(fn: (r) => r.name == params.bucket)', params={"bucket": cls.bucket})
+        except ApiException as e:
+            if e.status != 400 or "undefined identifier params" not in str(e.body or ""):
+                cls.client.close()
+                raise
+            cls.supports_params = False
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.client.close()
+
+    def query(self, query, uid, timestamp):
+        # bound the range tightly around the written point's timestamp
+        second = datetime.timedelta(seconds=1)
+        params = {"bucket": self.bucket, "id": uid, "start": timestamp - second, "stop": timestamp + second}
+        if self.supports_params:
+            return self.query_api.query(query, params=params)
+        return self.query_api.query(re.sub(r"params\.(\w+)", lambda m: flux_literal(params[m.group(1)]), query))
 
     def test_insert_record(self):
         uid = str(uuid.uuid4())
@@ -20,15 +65,9 @@ class TestInfluxDBService(unittest.TestCase):
         timestamp = datetime.datetime.now(tz=pytz.UTC)
         InfluxDB.insert_record(self.bucket, "usageLog", tags, "usage", 30.0, timestamp=timestamp)
 
-        with InfluxDBClient.from_env_properties() as client:
-            query_api = client.query_api()
-            query = '''from(bucket:"{bucket}")
-                |> range(start: -1m) 
-                |> filter(fn: (r) => r._measurement == "usageLog" and r.device == "cpu" and r.id == "{id}")
-            '''.format(bucket=self.bucket, id=uid)
-            tables = query_api.query(query)
-            for table in tables:
-                self.assertEqual(len(table.records), 1)
+        tables = self.query(USAGE_LOG_QUERY, uid, timestamp)
+        for table in tables:
+            self.assertEqual(len(table.records), 1)
     
     def test_insert_multiple_records(self):
         uid = str(uuid.uuid4())
@@ -36,16 +75,9 @@ class TestInfluxDBService(unittest.TestCase):
         timestamp = datetime.datetime.now(tz=pytz.UTC)
         fields = [("temp", 48.7), ("temp", 48.8), ("temp", 47.7)]
         InfluxDB.insert_multiple_records(self.bucket, "airTemperature", tags, fields, timestamp=timestamp)
-        with InfluxDBClient.from_env_properties() as client:
-            query_api = client.query_api()
-            query = '''from(bucket:"{bucket}")
-                |> range(start: -1m) 
-                |> filter(fn: (r) => r._measurement == "airTemperature" and r.sensor_id == "{id}")
-                |> yield()
-            '''.format(bucket=self.bucket, id=uid)
-            tables = query_api.query(query)
-            for table in tables:
-                self.assertEqual(len(table.records), len(fields))
+        tables = self.query(AIR_TEMPERATURE_QUERY, uid, timestamp)
+        for table in tables:
+            self.assertEqual(len(table.records), len(fields))
 
 
 if __name__ == '__main__':